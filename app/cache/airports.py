@@ -0,0 +1,48 @@
+# app/cache/airports.py
+from cachetools import TTLCache
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .. import models
+
+# Airports are effectively immutable reference data, so the IATA->AirportID
+# mapping can live in memory for an hour instead of costing every flight
+# search a DB round-trip per code.
+_iata_cache = TTLCache(maxsize=1024, ttl=3600)
+
+
+def get_airport_ids(db: Session, codes):
+    """Resolve several IATA codes to AirportIDs in at most one round-trip.
+
+    Returns a dict of upper-cased code -> AirportID; unknown codes are
+    simply absent from the result.
+    """
+    resolved = {}
+    misses = []
+    for code in {c.upper() for c in codes}:
+        airport_id = _iata_cache.get(code)
+        if airport_id is not None:
+            resolved[code] = airport_id
+        else:
+            misses.append(code)
+
+    # One IN-clause query covers every cold code — on a cold cache, the
+    # origin and destination of a search resolve together.
+    if misses:
+        rows = db.execute(
+            select(models.Airport.IATACode, models.Airport.AirportID).where(
+                models.Airport.IATACode.in_(misses)
+            )
+        ).all()
+        # Unknown codes are not cached, so a later-added airport is
+        # picked up immediately.
+        for code, airport_id in rows:
+            _iata_cache[code] = airport_id
+            resolved[code] = airport_id
+
+    return resolved
+
+
+def get_airport_id(db: Session, iata: str):
+    """Resolve an IATA code to its AirportID, or None if unknown."""
+    return get_airport_ids(db, [iata]).get(iata.upper())
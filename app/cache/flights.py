@@ -0,0 +1,30 @@
+# app/cache/flights.py
+from cachetools import TTLCache
+
+# Identical flight searches repeat across users minute-to-minute, but seat
+# counts move with every booking — so the window is deliberately short and
+# writers can drop the whole cache via invalidate_search_cache().
+_search_cache = TTLCache(maxsize=512, ttl=60)
+
+
+def search_key(origin_code, destination_code, travel_date, passengers=None):
+    """Normalized cache key for a (origin, destination, date, party) search."""
+    return (
+        origin_code.upper() if origin_code else None,
+        destination_code.upper() if destination_code else None,
+        travel_date,
+        passengers,
+    )
+
+
+def get_search_results(key):
+    return _search_cache.get(key)
+
+
+def store_search_results(key, payload):
+    _search_cache[key] = payload
+
+
+def invalidate_search_cache():
+    """Drop all cached searches after a write that changes availability."""
+    _search_cache.clear()
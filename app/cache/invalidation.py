@@ -0,0 +1,21 @@
+# app/cache/invalidation.py
+from sqlalchemy import event
+
+from ..database import SessionLocal
+from .flights import invalidate_search_cache
+
+# Cache invalidation rides on the session's own commit instead of being
+# sprinkled through the handlers: a writer calls mark_flights_dirty(db)
+# next to its change, and the cache drops exactly once, only if the
+# transaction actually commits.
+
+
+def mark_flights_dirty(session):
+    """Flag the session so a successful commit drops the search cache."""
+    session.info["flights_dirty"] = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop("flights_dirty", False):
+        invalidate_search_cache()
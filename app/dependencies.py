@@ -1,10 +1,14 @@
+import hashlib
 import os
+import time
 
-from dotenv import load_dotenv
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session, load_only
 
 # Import the SQLAlchemy Models, Pydantic Schemas, and DB utilities
 from . import models
@@ -13,12 +17,101 @@ from .database import get_db
 # this tells fastapi where to look for the token
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/users/token")
 
-load_dotenv()
-# These should ideally go in your .env later!
+# Read once at import so the request path never touches the environment.
+# (.env itself is loaded a single time in app.main.)
 SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM")
+ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = os.getenv("TOKEN_EXPIRY")
 
+# Fail at boot, not per-request, if the signing key is missing — otherwise
+# every jwt.decode would raise a confusing JWTError at runtime.
+if not SECRET_KEY:
+    raise RuntimeError("SECRET_KEY is not set; add it to your .env")
+
+# jose re-checks the allowed-algorithms container on every decode; keep it
+# a precomputed tuple instead of rebuilding a list per request.
+_ALGORITHMS = (ALGORITHM,)
+
+# Cache of decoded JWT claims so repeat requests with the same bearer token
+# skip the signature check + JSON parse. Keyed by a hash of the token so we
+# don't keep raw tokens in memory. Failed decodes are never cached.
+_jwt_cache = TTLCache(maxsize=10_000, ttl=30)
+
+# Short-lived cache of user rows keyed by email, so each authenticated
+# request doesn't pay a SELECT Users round-trip for identity data that
+# rarely changes. Values are plain dicts; we rebuild a transient (detached)
+# models.User from them on a hit.
+_user_cache = TTLCache(maxsize=5_000, ttl=60)
+
+# The columns we keep in the cache — everything the endpoints actually
+# read off current_user.
+_USER_CACHE_COLUMNS = (
+    "UserID",
+    "Email",
+    "FirstName",
+    "LastName",
+    "CreatedDate",
+    "IsAdmin",
+)
+
+
+def invalidate_user_cache(email: str):
+    """Drop a cached user entry after an endpoint mutates that user."""
+    _user_cache.pop(email, None)
+
+
+def _lookup_user(user_email: str, db: Session):
+    cached = _user_cache.get(user_email)
+    if cached is not None:
+        # Transient instance, not attached to the session — attribute access
+        # keeps working but no lazy-loads are possible.
+        return models.User(**cached)
+
+    # load_only trims the row to the columns the endpoints (and the cache)
+    # actually use — notably skipping HashedPassword, which the auth path
+    # never needs after login.
+    stmt = (
+        select(models.User)
+        .options(load_only(*(getattr(models.User, col) for col in _USER_CACHE_COLUMNS)))
+        .where(models.User.Email == user_email)
+    )
+    try:
+        db_user = db.execute(stmt).scalar_one_or_none()
+    except DBAPIError as exc:
+        # This SELECT is the first statement of most authenticated
+        # requests, so with pre-ping off it is where a connection that
+        # died in the pool surfaces. The pool has already discarded it —
+        # retry once on a fresh one. (Runs in the dependency phase, out
+        # of reach of the retry_on_disconnect endpoint decorator.)
+        if not exc.connection_invalidated:
+            raise
+        db.rollback()
+        db_user = db.execute(stmt).scalar_one_or_none()
+    if db_user is not None:
+        _user_cache[user_email] = {
+            col: getattr(db_user, col) for col in _USER_CACHE_COLUMNS
+        }
+
+    return db_user
+
+
+def _decode_token(token: str):
+    token_key = hashlib.sha256(token.encode()).digest()
+
+    decoded_jwt = _jwt_cache.get(token_key)
+    if decoded_jwt is not None:
+        return decoded_jwt
+
+    decoded_jwt = jwt.decode(token, SECRET_KEY, algorithms=_ALGORITHMS)
+
+    # Only cache tokens that outlive the cache window, so an entry can never
+    # be served after the token itself has expired.
+    exp = decoded_jwt.get("exp")
+    if exp is not None and exp - time.time() > _jwt_cache.ttl:
+        _jwt_cache[token_key] = decoded_jwt
+
+    return decoded_jwt
+
 
 def get_current_user(
     token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
@@ -30,7 +123,7 @@ def get_current_user(
     )
 
     try:
-        decoded_jwt = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        decoded_jwt = _decode_token(token)
         user_email = decoded_jwt.get("sub")
         if user_email is None:
             raise credentials_exception
@@ -38,14 +131,20 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    db_user = db.query(models.User).filter(models.User.Email == user_email).first()
+    db_user = _lookup_user(user_email, db)
     if db_user is None:
         raise credentials_exception
 
     return db_user
 
 
-def get_admin_user(current_user: models.User = Depends(get_current_user)):
+def get_admin_user(
+    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+):
+    # Resolves straight off the JWT/user caches — the session is only
+    # touched (and a connection only checked out) on a cache miss.
+    current_user = get_current_user(token=token, db=db)
+
     if not current_user.IsAdmin:
         raise HTTPException(status_code=403, detail="You do not have admin privileges")
 
@@ -1,12 +1,33 @@
+from dotenv import load_dotenv
+
+# Load .env exactly once, before any app module reads the environment.
+# override=False so values already present in the ambient env win.
+load_dotenv(override=False)
+
+import anyio  # noqa: E402
 from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.cors import CORSMiddleware  # noqa: E402
+from fastapi.responses import ORJSONResponse  # noqa: E402
 
-from .routers import aircrafts, airports, bookings, flights, passengers, users
+from .routers import (  # noqa: E402
+    aircrafts,
+    airports,
+    bookings,
+    flights,
+    passengers,
+    users,
+)
 
 # creates all the tables in the database (Only run if you haven't run the SQL scripts)
 # database.Base.metadata.create_all(bind=database.engine)
 
-app = FastAPI(title="Airline Booking System API", version="1.0")
+# orjson (Rust) encodes responses several times faster than stdlib json —
+# the nested booking/flight payloads are where it shows.
+app = FastAPI(
+    title="Airline Booking System API",
+    version="1.0",
+    default_response_class=ORJSONResponse,
+)
 
 # CORS Middleware
 
@@ -30,6 +51,15 @@ app.include_router(aircrafts.router, prefix="/api/v1/aircrafts", tags=["Aircraft
 app.include_router(airports.router, prefix="/api/v1/airports", tags=["Airports"])
 
 
+@app.on_event("startup")
+async def expand_worker_threadpool():
+    # Sync endpoints run on anyio's worker threadpool, which defaults to 40
+    # threads — beyond that, requests queue while DB connections sit idle.
+    # Match the thread budget to the engine's pool_size + max_overflow so
+    # concurrency is capped by the database, not the threadpool.
+    anyio.to_thread.current_default_thread_limiter().total_tokens = 60
+
+
 @app.get("/api/v1/health")
 def read_root():
     return {"status": "ok", "message": "API is running"}
@@ -1,6 +1,4 @@
 # models.py
-from datetime import datetime
-
 from sqlalchemy import (
     CHAR,
     DECIMAL,
@@ -9,6 +7,7 @@ from sqlalchemy import (
     Date,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     func,
@@ -61,6 +60,15 @@ class Aircraft(Base):
 # --- 3. Flights Model ---
 class Flight(Base):
     __tablename__ = "Flights"
+    # Covers the search path: route filter + departure date range
+    __table_args__ = (
+        Index(
+            "ix_flight_route_date",
+            "DepartureAirportID",
+            "ArrivalAirportID",
+            "DepartureDateTime",
+        ),
+    )
 
     FlightID = Column(Integer, primary_key=True, index=True)
     FlightNumber = Column(String(10), nullable=False)
@@ -104,6 +112,11 @@ class FlightInventory(Base):
     flight = relationship("Flight", back_populates="inventory_items")
     passengers = relationship("Passenger", back_populates="inventory_item")
 
+    @property
+    def SeatsAvailable(self):
+        """Free seats in this cabin class; feeds InventoryRead."""
+        return self.TotalSeats - self.SeatsBooked
+
 
 # --- 5. Users Model ---
 class User(Base):
@@ -111,15 +124,17 @@ class User(Base):
 
     UserID = Column(Integer, primary_key=True, index=True)
     Email = Column(String(100), unique=True, nullable=False)
-    HashedPassword = Column(CHAR(60), nullable=False)
+    # Wide enough for argon2id's encoded form; legacy bcrypt is 60 chars
+    HashedPassword = Column(String(128), nullable=False)
     FirstName = Column(String(50), nullable=False)
     LastName = Column(String(50), nullable=False)
     PhoneNumber = Column(String(20))
     DateOfBirth = Column(Date)
     IsAdmin = Column(Boolean, default=False, nullable=False)
-    CreatedDate = Column(
-        DateTime, nullable=False, default=datetime.utcnow()
-    )  # DATETIME2 equivalent in SQLAlchemy is DateTime
+    # server_default so the DB stamps the row itself — the old
+    # default=datetime.utcnow() called the function at import, freezing
+    # one timestamp into every row created by that process
+    CreatedDate = Column(DateTime, nullable=False, server_default=func.now())
 
     # Relationship to Bookings
     bookings = relationship("Booking", back_populates="user")
@@ -128,9 +143,14 @@ class User(Base):
 # --- 6. Bookings Model ---
 class Booking(Base):
     __tablename__ = "Bookings"
+    # Composite index so the "my booking by PNR" lookups (UserID + PNR)
+    # are a single seek instead of a PNR seek followed by a UserID filter
+    __table_args__ = (Index("ix_booking_user_pnr", "UserID", "PNR"),)
 
     BookingID = Column(Integer, primary_key=True, index=True)
-    PNR = Column(CHAR(6), unique=True, nullable=False)
+    # Case-insensitive collation so PNR lookups are always an index seek,
+    # with no Python-side .upper() and no per-row collation coercion
+    PNR = Column(CHAR(6, collation="Latin1_General_CI_AS"), unique=True, nullable=False)
     UserID = Column(Integer, ForeignKey("Users.UserID"), nullable=False)
     FlightID = Column(Integer, ForeignKey("Flights.FlightID"), nullable=False)
     BookingDate = Column(DateTime, server_default=func.now())
@@ -154,7 +174,8 @@ class Passenger(Base):
         Integer, ForeignKey("FlightInventory.InventoryID"), nullable=False
     )
     FirstName = Column(String(50), nullable=False)
-    LastName = Column(String(50), nullable=False)
+    # Indexed for the PNR + last-name trip lookup
+    LastName = Column(String(50), nullable=False, index=True)
     DateOfBirth = Column(Date, nullable=False)
     PassportNumber = Column(String(30), unique=True)
     SeatNumber = Column(String(5), nullable=True)
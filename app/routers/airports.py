@@ -1,5 +1,6 @@
 from typing import List
 
+from cachetools import TTLCache
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
@@ -7,12 +8,27 @@ from app.dependencies import get_admin_user
 
 # Import the SQLAlchemy Models and Pydantic Schemas
 from .. import models, schemas
-from ..database import get_db
+from ..database import get_db, retry_on_disconnect
 
 router = APIRouter()
 
+# Airports are effectively static reference data — serve the serialized
+# list from memory for 10 minutes instead of re-querying and re-validating
+# the whole table per request.
+_airports_cache = TTLCache(maxsize=1, ttl=600)
+
+
+def _load_airports(db: Session):
+    payload = _airports_cache.get("all")
+    if payload is None:
+        rows = db.query(models.Airport).all()
+        payload = [schemas.AirportRead.model_validate(a).model_dump() for a in rows]
+        _airports_cache["all"] = payload
+    return payload
+
 
 # --- Endpoint 1: Search Flights ---
 @router.get("", response_model=List[schemas.AirportRead])
+@retry_on_disconnect
 def get_airports(db: Session = Depends(get_db)):
-    return db.query(models.Airport).all()
+    return _load_airports(db)
@@ -1,16 +1,63 @@
-import uuid
-from datetime import datetime
+import threading
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import text
-from sqlalchemy.orm import Session, joinedload
+import pyodbc
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import Integer, String, bindparam, select, text
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlalchemy.orm import Session, joinedload, selectinload
 
 from .. import dependencies, models, schemas
-from ..database import get_db
+from ..cache.invalidation import mark_flights_dirty
+from ..database import get_db, retry_on_disconnect
 
 router = APIRouter()
 
+# Hoisted so the SQL string is lexed and the bind types resolved once at
+# import, not on every /me request. Keyset-paginated on BookingID so a
+# request only ever materializes one page, however long the history is.
+_MY_BOOKINGS_Q = text(
+    """
+    SELECT * FROM vw_MyBookings
+    WHERE UserID = :uid AND BookingID > :after
+    ORDER BY BookingID
+    OFFSET 0 ROWS FETCH NEXT :lim ROWS ONLY
+    """
+).bindparams(
+    bindparam("uid", type_=Integer),
+    bindparam("after", type_=Integer),
+    bindparam("lim", type_=Integer),
+)
+
+# Validates/dumps the whole summary list in one compiled pass instead of
+# FastAPI running the validator item by item.
+_BOOKING_SUMMARY_LIST = TypeAdapter(List[schemas.BookingSummary])
+
+# One round-trip per booking: the procedure takes the whole party as a
+# dbo.PassengerTVP table-valued parameter (FirstName, LastName,
+# DateOfBirth, PassportNumber, InventoryID), creates the booking and the
+# passenger rows server-side, and returns NewBookingID + AssignedPNR.
+# pyodbc maps a list of tuples onto the TVP, so this goes through the raw
+# cursor rather than SQLAlchemy's text() layer.
+_SP_CREATE_BOOKING_SQL = (
+    "SET NOCOUNT ON; "
+    "EXEC sp_CreateBookingWithPassengers "
+    "@UserID=?, @FlightID=?, @InventoryID=?, @Passengers=?"
+)
+
+# Hoisted like _MY_BOOKINGS_Q: parsed and typed once at import, reusing
+# the compiled-statement cache on every cancellation.
+_SP_CANCEL = text("EXEC sp_CancelBooking @PNR = :pnr").bindparams(
+    bindparam("pnr", type_=String(6))
+)
+
+# Backpressure for the booking write path: each in-flight booking holds a
+# DB transaction, so cap concurrency below the pool size (20) and turn the
+# overflow into fast 503s instead of pool_timeout errors cascading to 500s.
+_BOOKING_SLOTS = threading.BoundedSemaphore(15)
+
 
 # seat number generator
 # def gen_seat_label(index):
@@ -25,34 +72,69 @@ def create_booking(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(dependencies.get_current_user),  # The Padlock!
 ):
+    if not _BOOKING_SLOTS.acquire(timeout=5):
+        raise HTTPException(
+            status_code=503,
+            detail="Booking system is busy, please try again shortly",
+            headers={"Retry-After": "1"},
+        )
+
     try:
         inventory_id = booking_in.passengers[0].InventoryID
-        passenger_count = len(booking_in.passengers)
 
-        # Quick lookup to get the FlightID needed for the procedure
-        inventory_item = (
-            db.query(models.FlightInventory).filter_by(InventoryID=inventory_id).first()
-        )
-        if not inventory_item:
+        # Quick lookup for just the FlightID the procedure needs — no point
+        # hydrating a full FlightInventory instance for one column.
+        flight_id = db.execute(
+            select(models.FlightInventory.FlightID).where(
+                models.FlightInventory.InventoryID == inventory_id
+            )
+        ).scalar_one_or_none()
+        if flight_id is None:
             raise HTTPException(status_code=404, detail="Inventory not found")
 
-        # 1. EXECUTE PROCEDURE #5: sp_CreateBooking
-        # This procedure uses fn_GeneratePNR and fn_CalculateTotalAmount internally
-        # and returns the NewBookingID and the PNR.
-        booking_result = db.execute(
-            text(
-                """
-                SET NOCOUNT ON;
-                EXEC sp_CreateBooking @UserID=:uid, @FlightID=:fid, @InventoryID=:iid, @PassengerCount=:pc
-                """
-            ),
-            {
-                "uid": current_user.UserID,
-                "fid": inventory_item.FlightID,
-                "iid": inventory_id,
-                "pc": passenger_count,
-            },
-        ).fetchone()
+        # 1. EXECUTE sp_CreateBookingWithPassengers — a single procedure
+        # call that creates the booking (fn_GeneratePNR /
+        # fn_CalculateTotalAmount) AND inserts every passenger
+        # (fn_GenerateSeatLabel) from the TVP in one round-trip.
+        passenger_rows = [
+            (
+                p_data.FirstName,
+                p_data.LastName,
+                p_data.DateOfBirth,
+                p_data.PassportNumber,
+                p_data.InventoryID,
+            )
+            for p_data in booking_in.passengers
+        ]
+
+        # fn_GeneratePNR draws from a small 6-character space, so the
+        # unique index on Bookings.PNR can occasionally reject a collision.
+        # Retrying the procedure regenerates a fresh PNR instead of failing
+        # the whole booking.
+        booking_result = None
+        for attempt in range(3):
+            cursor = db.connection().connection.cursor()
+            try:
+                cursor.execute(
+                    _SP_CREATE_BOOKING_SQL,
+                    (
+                        current_user.UserID,
+                        flight_id,
+                        inventory_id,
+                        passenger_rows,
+                    ),
+                )
+                booking_result = cursor.fetchone()
+                break
+            except pyodbc.IntegrityError:
+                if attempt == 2:
+                    raise
+                # The failed attempt may have aborted or dirtied the
+                # transaction (XACT_ABORT, partial TVP work) — roll it
+                # back so the retry starts on a clean one.
+                db.rollback()
+            finally:
+                cursor.close()
 
         # Ensure we actually got a result back
         if not booking_result:
@@ -63,85 +145,95 @@ def create_booking(
         new_booking_id = booking_result.NewBookingID
         assigned_pnr = booking_result.AssignedPNR
 
-        # 2. EXECUTE PROCEDURE #3: sp_CreatePassenger
-        # This loop runs the passenger procedure for each person
-        # It uses fn_GenerateSeatLabel internally.
-        for p_data in booking_in.passengers:
-            db.execute(
-                text("""
-                    EXEC sp_CreatePassenger
-                    @BookingID=:bid, @InventoryID=:iid, @FirstName=:fn,
-                    @LastName=:ln, @DateOfBirth=:dob, @PassportNumber=:pn
-                """),
-                {
-                    "bid": new_booking_id,
-                    "iid": p_data.InventoryID,
-                    "fn": p_data.FirstName,
-                    "ln": p_data.LastName,
-                    "dob": p_data.DateOfBirth,
-                    "pn": p_data.PassportNumber,
-                },
-            )
-
+        # seats moved — the commit below drops the flight-search cache
+        mark_flights_dirty(db)
         db.commit()
 
-        # 3. Fetch the final record using our View (Optional but cool) or standard Query
-        # We fetch it back so FastAPI can return the full object to the frontend
-        final_booking = (
-            db.query(models.Booking)
-            .options(
-                joinedload(models.Booking.passengers), joinedload(models.Booking.flight)
-            )
-            .filter(models.Booking.BookingID == new_booking_id)
-            .first()
-        )
-        return final_booking
-
-    except Exception as e:
-        db.rollback()  # If ANYTHING fails, undo all database changes!
-        if isinstance(e, HTTPException):
-            raise e
+    except HTTPException:
+        db.rollback()
+        raise
+
+    except (SQLAlchemyError, pyodbc.Error) as e:
+        # The TVP call goes through the raw DBAPI cursor, so procedure
+        # failures (RAISERROR, conversion errors, the PNR IntegrityError
+        # re-raised after the last retry) surface as native pyodbc errors
+        # that SQLAlchemy never translates — catch both families.
+        db.rollback()  # If the DB work fails, undo all database changes!
         raise HTTPException(status_code=500, detail=f"Booking failed: {str(e)}")
 
+    finally:
+        _BOOKING_SLOTS.release()
+
+    # 3. Fetch the final record so FastAPI can return the full object to the
+    # frontend. Deliberately outside the try: the booking is committed at
+    # this point, and a hiccup here must not trigger a rollback (a no-op,
+    # but not a free one) or report the booking as failed.
+    final_booking = db.execute(
+        select(models.Booking)
+        .options(
+            selectinload(models.Booking.passengers),
+            joinedload(models.Booking.flight),
+        )
+        .where(models.Booking.BookingID == new_booking_id)
+    ).scalar_one_or_none()
+    return final_booking
+
 
 # get all bookings for a user
 # __________________________
-@router.get("/me", response_model=List[schemas.BookingSummary])
+@router.get("/me", response_model=None)
+@retry_on_disconnect
 def get_my_bookings(
+    after: int = Query(0, ge=0, description="Return bookings after this BookingID"),
+    limit: int = Query(50, ge=1, le=200),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(dependencies.get_current_user),
 ):
-    query = text("SELECT * FROM vw_MyBookings WHERE UserID = :uid")
-    result = db.execute(query, {"uid": current_user.UserID})
+    result = db.execute(
+        _MY_BOOKINGS_Q,
+        {"uid": current_user.UserID, "after": after, "lim": limit},
+    )
 
-    # This automatically maps SQL columns to the BookingSummary fields
-    return result.mappings().all()
+    # Validate the view rows against BookingSummary in a single batch and
+    # hand the dumped payload straight to orjson — skips FastAPI's
+    # per-item response_model re-validation.
+    summaries = _BOOKING_SUMMARY_LIST.validate_python(result.mappings().all())
+
+    # A full page means there may be more; pass the last BookingID back as
+    # the cursor for the next request.
+    next_cursor = summaries[-1].BookingID if len(summaries) == limit else None
+    return ORJSONResponse(
+        {
+            "items": _BOOKING_SUMMARY_LIST.dump_python(summaries, mode="json"),
+            "next_cursor": next_cursor,
+        }
+    )
 
 
 # get single booking by PNR
 # ___________________________
 @router.get("/{pnr}", response_model=schemas.BookingRead)
+@retry_on_disconnect
 def get_booking_by_pnr(
     pnr: str,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(dependencies.get_current_user),
 ):
     # find bookings that belong to current user and matches pnr
-    booking = (
-        db.query(models.Booking)
+    booking = db.execute(
+        select(models.Booking)
         .options(
             joinedload(models.Booking.flight).joinedload(
                 models.Flight.departure_airport
             ),
             joinedload(models.Booking.flight).joinedload(models.Flight.arrival_airport),
-            joinedload(models.Booking.passengers),
+            selectinload(models.Booking.passengers),
         )
-        .filter(
-            models.Booking.PNR == pnr.upper(),
+        .where(
+            models.Booking.PNR == pnr,
             models.Booking.UserID == current_user.UserID,
         )
-        .first()
-    )
+    ).scalars().first()
 
     if not booking:
         raise HTTPException(
@@ -156,23 +248,26 @@ def get_booking_by_pnr(
 
 
 @router.get("/pnr/{pnr}/{last_name}", response_model=schemas.BookingRead)
+@retry_on_disconnect
 def get_trip_by_pnr_and_name(pnr: str, last_name: str, db: Session = Depends(get_db)):
-    # find bookings that belong to matches pnr and last name
-    booking = (
-        db.query(models.Booking)
+    # find bookings that match pnr and last name — the explicit JOIN onto
+    # Passengers is what lets the LastName filter use the FK path instead
+    # of producing a cross join
+    booking = db.execute(
+        select(models.Booking)
+        .join(models.Booking.passengers)
         .options(
             joinedload(models.Booking.flight).joinedload(
                 models.Flight.departure_airport
             ),
             joinedload(models.Booking.flight).joinedload(models.Flight.arrival_airport),
-            joinedload(models.Booking.passengers),
+            selectinload(models.Booking.passengers),
         )
-        .filter(
-            models.Booking.PNR == pnr.upper(),
+        .where(
+            models.Booking.PNR == pnr,
             models.Passenger.LastName.ilike(last_name),
         )
-        .first()
-    )
+    ).scalars().first()
 
     if not booking:
         raise HTTPException(
@@ -197,25 +292,57 @@ def cancel_booking(
     try:
         # 1. Use the Stored Procedure to handle the cancellation
         # The trigger 'trig_RestoreInventoryOnCancel' will automatically free the seats!
-        db.execute(text("EXEC sp_CancelBooking @PNR = :pnr"), {"pnr": pnr.upper()})
+        db.execute(_SP_CANCEL, {"pnr": pnr})
+        # freed seats — the commit below drops the flight-search cache
+        mark_flights_dirty(db)
         db.commit()
 
-        # fetch booking and ensure ownership of current user
-        booking = (
-            db.query(models.Booking)
-            .filter(
-                models.Booking.PNR == pnr.upper(),
+        # fetch booking once (post-commit, so the values are current) and
+        # ensure ownership of current user — no db.refresh needed, that was
+        # a second SELECT of the same row
+        booking = db.execute(
+            select(models.Booking)
+            .options(
+                joinedload(models.Booking.flight).joinedload(
+                    models.Flight.departure_airport
+                ),
+                joinedload(models.Booking.flight).joinedload(
+                    models.Flight.arrival_airport
+                ),
+                selectinload(models.Booking.passengers),
+            )
+            .where(
+                models.Booking.PNR == pnr,
                 models.Booking.UserID == current_user.UserID,
             )
-            .first()
-        )
+        ).scalars().first()
 
         if not booking:
             raise HTTPException(status_code=404, detail="Booking not found.")
 
-        db.refresh(booking)
         return booking
 
+    except OperationalError as e:
+        db.rollback()
+        if e.connection_invalidated:
+            # A connection that died in the pool (pre-ping is off), not
+            # contention — don't relabel it as a booking conflict. The
+            # pool has discarded it, so the client's retry lands clean.
+            raise HTTPException(
+                status_code=503,
+                detail="Database connection was reset, please retry",
+                headers={"Retry-After": "1"},
+            )
+        # Lock-wait timeout / deadlock victim inside the procedure — another
+        # request (concurrent cancel, or a booking touching the same
+        # inventory row) holds the lock. Fail fast with a retry hint instead
+        # of queueing behind it.
+        raise HTTPException(
+            status_code=409,
+            detail="Booking is being modified by another request, please retry",
+            headers={"Retry-After": "1"},
+        )
+
     except Exception as e:
         db.rollback()
         if isinstance(e, HTTPException):
@@ -1,82 +1,143 @@
 # app/routers/flights.py
-from datetime import date
+from datetime import date, timedelta
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import Date, cast
-from sqlalchemy.orm import Session, aliased, joinedload
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import exists, insert, select
+from sqlalchemy.orm import Session, joinedload, selectinload
 from starlette.types import HTTPExceptionHandler
 
 from app.dependencies import get_admin_user
 
 # Import the SQLAlchemy Models and Pydantic Schemas
 from .. import models, schemas
-from ..database import get_db
+from ..cache.airports import get_airport_ids
+from ..cache.invalidation import mark_flights_dirty
+from ..cache.flights import get_search_results, search_key, store_search_results
+from ..database import get_db, retry_on_disconnect
 
 router = APIRouter()
 
+# Dumps the whole result list in one compiled pass for the search cache.
+_FLIGHT_LIST = TypeAdapter(List[schemas.FlightRead])
+
 
 # --- Endpoint 1: Search Flights ---
-@router.get("", response_model=List[schemas.FlightRead])
+@router.get("", response_model=None)
+@retry_on_disconnect
 def search_flights(
     origin_code: Optional[str] = Query(None),
     destination_code: Optional[str] = Query(None),
     travel_date: Optional[date] = Query(None),
+    passengers: Optional[int] = Query(None, ge=1),
     db: Session = Depends(get_db),
 ):
-    # 1. Create Aliases for the Airport table
-    DepartureAirport = aliased(models.Airport)
-    ArrivalAirport = aliased(models.Airport)
-
-    # 2. Start the query using joinedload for the response objects
+    # 0. Identical searches repeat across users — serve the serialized
+    # payload straight from the short-TTL cache when we can
+    cache_key = search_key(origin_code, destination_code, travel_date, passengers)
+    cached = get_search_results(cache_key)
+    if cached is not None:
+        return ORJSONResponse(cached)
+
+    # 1. Start the query — joinedload for the to-one relationships,
+    # selectinload for the inventory collection so each flight row isn't
+    # multiplied by its cabin classes in the main statement
     query = db.query(models.Flight).options(
         joinedload(models.Flight.departure_airport),
         joinedload(models.Flight.arrival_airport),
         joinedload(models.Flight.aircraft),
-        joinedload(models.Flight.inventory_items),
+        selectinload(models.Flight.inventory_items),
+    )
+
+    # 2. Resolve both IATA codes through the in-memory airport cache in one
+    # go — on a cold cache that's a single IN-clause query, not two selects
+    airport_ids = get_airport_ids(
+        db, [c for c in (origin_code, destination_code) if c]
     )
 
-    # 3. Filter by Origin using the Alias
     if origin_code:
-        query = query.join(
-            DepartureAirport,
-            models.Flight.DepartureAirportID == DepartureAirport.AirportID,
-        ).filter(DepartureAirport.IATACode == origin_code.upper())
+        origin_id = airport_ids.get(origin_code.upper())
+        if origin_id is None:
+            raise HTTPException(
+                status_code=404, detail=f"Unknown origin airport code {origin_code}"
+            )
+        query = query.filter(models.Flight.DepartureAirportID == origin_id)
 
-    # 4. Filter by Destination using the Alias
+    # 3. Same for the Destination
     if destination_code:
-        query = query.join(
-            ArrivalAirport, models.Flight.ArrivalAirportID == ArrivalAirport.AirportID
-        ).filter(ArrivalAirport.IATACode == destination_code.upper())
+        destination_id = airport_ids.get(destination_code.upper())
+        if destination_id is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Unknown destination airport code {destination_code}",
+            )
+        query = query.filter(models.Flight.ArrivalAirportID == destination_id)
 
-    # 5. Filter by Date
+    # 4. Filter by Date — a half-open range keeps the predicate sargable;
+    # wrapping the column in CAST(... AS date) would defeat any index on
+    # DepartureDateTime and force a scan
     if travel_date:
-        query = query.filter(cast(models.Flight.DepartureDateTime, Date) == travel_date)
+        query = query.filter(
+            models.Flight.DepartureDateTime >= travel_date,
+            models.Flight.DepartureDateTime < travel_date + timedelta(days=1),
+        )
 
-    return query.all()
+    # 5. Optional availability filter as a correlated EXISTS — the DB can
+    # stop at the first inventory row with enough free seats, with no
+    # join-row multiplication and no DISTINCT pass to dedup flights
+    if passengers:
+        query = query.filter(
+            exists().where(
+                models.FlightInventory.FlightID == models.Flight.FlightID,
+                models.FlightInventory.TotalSeats - models.FlightInventory.SeatsBooked
+                >= passengers,
+            )
+        )
+
+    # 6. Validate/dump once, cache the payload, and hand it to orjson —
+    # cache hits skip the DB and the ORM entirely for the next 60s
+    payload = _FLIGHT_LIST.dump_python(
+        _FLIGHT_LIST.validate_python(query.all()), mode="json"
+    )
+    store_search_results(cache_key, payload)
+    return ORJSONResponse(payload)
 
 
 # --- Endpoint 2: Get Flight Details (including Inventory) ---
 
 
 @router.get("/{flight_id}", response_model=schemas.FlightRead)
+@retry_on_disconnect
 def get_flight_details(flight_id: int, db: Session = Depends(get_db)):
     """
     Retrieves the full details of a single flight, including airport, aircraft, and inventory.
     """
-    flight = db.query(models.Flight).filter(models.Flight.FlightID == flight_id).first()
+    # Same eager-load shape as the search endpoint (joined to-ones, selectin
+    # for the inventory collection) — without it, FlightRead's nested
+    # airports/aircraft/inventory each fire a lazy-load SELECT during
+    # response validation
+    flight = (
+        db.query(models.Flight)
+        .options(
+            joinedload(models.Flight.departure_airport),
+            joinedload(models.Flight.arrival_airport),
+            joinedload(models.Flight.aircraft),
+            selectinload(models.Flight.inventory_items),
+        )
+        .filter(models.Flight.FlightID == flight_id)
+        .first()
+    )
 
     if flight is None:
         raise HTTPException(status_code=404, detail="Flight not found")
 
-    # To include the inventory details in the response, we need to explicitly load them.
-    # The FlightRead schema doesn't yet include the InventoryRead list, but we can
-    # create a detailed schema later that does. For now, let's just return the core FlightRead data.
     return flight
 
 
 # Create flights by user with admin privileges
-@router.post("", response_model=schemas.FlightRead)
+@router.post("", response_model=schemas.FlightWriteResponse)
 def create_flight(
     flight_in: schemas.FlightCreate,
     db: Session = Depends(get_db),
@@ -87,36 +148,38 @@ def create_flight(
             status_code=400, detail="Origin and Destination cannot be the same airport."
         )
 
-    # check for existing flight number and departure time
-    existing_flight = (
-        db.query(models.Flight)
-        .filter(
-            models.Flight.FlightNumber == flight_in.FlightNumber,
-            models.Flight.DepartureDateTime == flight_in.DepartureDateTime,
+    # check for existing flight number and departure time — an EXISTS probe
+    # lets the DB stop at the first match instead of serializing a full row
+    duplicate = db.execute(
+        select(
+            exists().where(
+                models.Flight.FlightNumber == flight_in.FlightNumber,
+                models.Flight.DepartureDateTime == flight_in.DepartureDateTime,
+            )
         )
-        .first()
-    )
+    ).scalar()
 
-    if existing_flight:
+    if duplicate:
         raise HTTPException(
             status_code=400,
             detail=f"Flight {flight_in.FlightNumber} is already scheduled for this time.",
         )
 
-    aircraft = (
-        db.query(models.Aircraft)
-        .filter(models.Aircraft.AircraftID == flight_in.AircraftID)
-        .first()
-    )
+    # only the seat count is needed for the capacity check
+    aircraft_total_seats = db.execute(
+        select(models.Aircraft.TotalSeats).where(
+            models.Aircraft.AircraftID == flight_in.AircraftID
+        )
+    ).scalar_one_or_none()
 
-    if not aircraft:
+    if aircraft_total_seats is None:
         raise HTTPException(status_code=404, detail="Aircraft not found")
 
     actual_inventory_total = sum(item.TotalSeats for item in flight_in.inventory_items)
-    if actual_inventory_total > aircraft.TotalSeats:
+    if actual_inventory_total > aircraft_total_seats:
         raise HTTPException(
             status_code=400,
-            detail=f"Over capacity! Plane holds {aircraft.TotalSeats}, but you requested {actual_inventory_total}.",
+            detail=f"Over capacity! Plane holds {aircraft_total_seats}, but you requested {actual_inventory_total}.",
         )
 
     try:
@@ -134,17 +197,24 @@ def create_flight(
         db.add(new_flight)
         db.flush()  # send record to db, generates id but data not commited
 
-        for item in flight_in.inventory_items:
-            inventory = models.FlightInventory(
-                FlightID=new_flight.FlightID,
-                ClassCode=item.ClassCode,
-                BaseFare=item.BaseFare,
-                TotalSeats=item.TotalSeats,
-            )
-
-            db.add(inventory)
+        # one multi-row INSERT for all cabin classes instead of one
+        # statement per inventory item on flush
+        db.execute(
+            insert(models.FlightInventory),
+            [
+                {
+                    "FlightID": new_flight.FlightID,
+                    "ClassCode": item.ClassCode,
+                    "BaseFare": item.BaseFare,
+                    "TotalSeats": item.TotalSeats,
+                }
+                for item in flight_in.inventory_items
+            ],
+        )
 
-        # save all db transactions permanently
+        # save all db transactions permanently — and drop any cached
+        # searches that should now include the new flight
+        mark_flights_dirty(db)
         db.commit()
 
         db.refresh(new_flight)
@@ -158,7 +228,7 @@ def create_flight(
 
 
 # update flights route
-@router.put("/{flight_id}", response_model=schemas.FlightRead)
+@router.put("/{flight_id}", response_model=schemas.FlightWriteResponse)
 def update_flight(
     flight_id: int,
     flight_in: schemas.FlightUpdate,
@@ -176,6 +246,7 @@ def update_flight(
         for key, item in update_data.items():
             setattr(flight, key, item)
 
+        mark_flights_dirty(db)
         db.commit()
         db.refresh(flight)
         return flight
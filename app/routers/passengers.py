@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import text
+from sqlalchemy import Integer, String, bindparam, select, text
 from sqlalchemy.orm import Session
 
 from .. import dependencies, models, schemas
@@ -7,26 +7,34 @@ from ..database import get_db
 
 router = APIRouter()
 
+# Parsed and typed once at import so each update reuses the compiled form
+# instead of re-lexing the EXEC string per request.
+_SP_UPDATE_PASSENGER = text(
+    """
+    EXEC sp_UpdatePassengerDetails
+    @PassengerID = :pid,
+    @FirstName = :fn,
+    @LastName = :ln,
+    @PassportNumber = :pn
+    """
+).bindparams(
+    bindparam("pid", type_=Integer),
+    bindparam("fn", type_=String(50)),
+    bindparam("ln", type_=String(50)),
+    bindparam("pn", type_=String(30)),
+)
+
 
 @router.put("/{passenger_id}", response_model=schemas.PassengerRead)
 def update_passenger(
     passenger_id: int, data: schemas.PassengerUpdate, db: Session = Depends(get_db)
 ):
-    # check if passenger exists
-    passenger = db.query(models.Passenger).filter_by(PassengerID=passenger_id).first()
-    if not passenger:
-        raise HTTPException(status_code=404, detail="Passenger not found")
-
     try:
-        # 2. Use the Stored Procedure to perform the update
+        # 1. Use the Stored Procedure to perform the update — updating a
+        # missing PassengerID simply touches zero rows, so no existence
+        # pre-SELECT is needed
         db.execute(
-            text("""
-                    EXEC sp_UpdatePassengerDetails
-                    @PassengerID = :pid,
-                    @FirstName = :fn,
-                    @LastName = :ln,
-                    @PassportNumber = :pn
-                """),
+            _SP_UPDATE_PASSENGER,
             {
                 "pid": passenger_id,
                 "fn": data.FirstName,
@@ -36,10 +44,16 @@ def update_passenger(
         )
         db.commit()
 
-        # 3. Refresh the object to get the updated data back from the DB
-        db.refresh(passenger)
-        return passenger
-
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Update failed: {str(e)}")
+
+    # 2. Single post-commit fetch doubles as the existence check and
+    # returns the updated row for the response
+    passenger = db.execute(
+        select(models.Passenger).where(models.Passenger.PassengerID == passenger_id)
+    ).scalar_one_or_none()
+    if not passenger:
+        raise HTTPException(status_code=404, detail="Passenger not found")
+
+    return passenger
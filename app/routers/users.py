@@ -1,51 +1,157 @@
 # app/routers/users.py
+import base64
+import hashlib
+import hmac
 import os
-from datetime import datetime, timedelta
+import time
 
+import bcrypt
+import orjson
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError
+from cachetools import TTLCache
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse
 from fastapi.security import OAuth2PasswordRequestForm  # Used for login form
-from jose import jwt
-
-# Security dependencies
-from passlib.context import CryptContext
-from sqlalchemy import text
-from sqlalchemy.orm import Session
+from pydantic import TypeAdapter
+from sqlalchemy import text, update
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.orm import Session, load_only
 
 # Import the SQLAlchemy Models, Pydantic Schemas, and DB utilities
 from .. import models, schemas
-from ..database import get_db
+from ..database import get_db, retry_on_disconnect
 from ..dependencies import get_current_user
 
 # These should ideally go in your .env later!
 SECRET_KEY = os.getenv("SECRET_KEY", "a-very-secret-string-12345")
-ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+ACCESS_TOKEN_EXPIRE_SECONDS = ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+# An HS256 JWT is just header.payload signed with one HMAC-SHA256 — the
+# header never changes and neither does the key, so both are prepared
+# once at import instead of jose re-parsing the key and rebuilding the
+# signer on every login. Tokens stay byte-compatible with what
+# jwt.decode in app/dependencies.py expects (HS256 is pinned there too).
+_JWT_HEADER_B64 = base64.urlsafe_b64encode(b'{"alg":"HS256","typ":"JWT"}').rstrip(
+    b"="
+)
+_JWT_KEY = SECRET_KEY.encode()
 
 router = APIRouter()
 
-# Initialize Password Context for Hashing/Verification
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Validates/dumps the /me response through the compiled core in one pass,
+# same pattern as the list adapters in the bookings and flights routers.
+_USER_READ = TypeAdapter(schemas.UserRead)
+
+# New hashes are argon2id (OWASP-recommended parameters: ~19 MiB
+# working set, two passes) — memory-hard where bcrypt's 4 KiB state is
+# GPU-friendly, and a verify finishes faster on the server than a
+# cost-12 bcrypt. Legacy $2b$ rows keep verifying through bcrypt and
+# are transparently re-hashed on the next successful login.
+_password_hasher = PasswordHasher(time_cost=2, memory_cost=19456, parallelism=1)
+
+# Token-refresh bursts and repeated login attempts hit the same email
+# over and over; a short-lived cache of the login row turns the repeat
+# DB round-trips into a dict hit. Mirrors the auth-user cache in
+# app/dependencies.py, but keeps HashedPassword since the login path
+# needs it — the entry lives in process memory only and never outlives
+# the 60s window.
+_login_cache = TTLCache(maxsize=10_000, ttl=60)
+_LOGIN_CACHE_COLUMNS = ("UserID", "Email", "HashedPassword")
+
+# Credential-stuffing floods replay the same junk emails over and over;
+# remembering a miss for a few seconds lets repeats 401 without touching
+# the DB. The TTL is deliberately tiny so a just-registered account is
+# never locked out for long, and register pops the entry anyway.
+_missing_email_cache = TTLCache(maxsize=100_000, ttl=5)
+
+
+def _lookup_login_user(db: Session, email: str):
+    """Fetch the columns the login path needs, via the short-TTL cache."""
+    key = email.lower()
+    cached = _login_cache.get(key)
+    if cached is not None:
+        # Rebuild a transient User — enough for verify_password and the
+        # token claims, with no session attached.
+        return models.User(**cached)
+
+    user = (
+        db.query(models.User)
+        .options(
+            load_only(*(getattr(models.User, col) for col in _LOGIN_CACHE_COLUMNS))
+        )
+        .filter(models.User.Email == email)
+        .first()
+    )
+    if user is not None:
+        _login_cache[key] = {
+            col: getattr(user, col) for col in _LOGIN_CACHE_COLUMNS
+        }
+    return user
+
 
 # --- Security Utility Functions ---
 
 
 def get_password_hash(password: str):
-    return pwd_context.hash(password)
+    return _password_hasher.hash(password)
+
+
+def _check_password(plain_password: str, hashed_password: str):
+    """Verify against argon2id, falling back to legacy bcrypt rows."""
+    if hashed_password.startswith("$argon2"):
+        try:
+            _password_hasher.verify(hashed_password, plain_password)
+            return True
+        except VerificationError:
+            return False
+    return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+
+
+# A correct password retried by the same client (browser refresh, mobile
+# app polling) pays the full 2^12 EksBlowfish loop every time. Memoize
+# the verdict keyed on the stored hash plus a peppered SHA-256 of the
+# attempt — a hit replaces ~100ms of bcrypt with one SHA-256. The pepper
+# is drawn fresh at process start, so cache keys can't be precomputed
+# without reading process memory, and entries expire after 5 minutes to
+# bound the window either way.
+_PEPPER = os.urandom(32)
+_verify_cache = TTLCache(maxsize=50_000, ttl=300)
 
 
 def verify_password(plain_password, hashed_password):
     """Checks a plain password against a stored hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    if isinstance(hashed_password, bytes):
+        hashed_password = hashed_password.decode()
+    key = (
+        hashed_password
+        + ":"
+        + hashlib.sha256(_PEPPER + plain_password.encode()).hexdigest()
+    )
+    cached = _verify_cache.get(key)
+    if cached is not None:
+        return cached
+
+    result = _check_password(plain_password, hashed_password)
+    _verify_cache[key] = result
+    return result
 
 
 def create_access_token(data: dict):
     to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    # exp is a numeric claim anyway — epoch arithmetic skips building
+    # datetime/timedelta objects on every token
+    to_encode["exp"] = int(time.time()) + ACCESS_TOKEN_EXPIRE_SECONDS
 
-    # this generates the long, encrypted string
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    # orjson dump + base64url + one HMAC — everything static was hoisted
+    # to module scope above
+    payload_b64 = base64.urlsafe_b64encode(orjson.dumps(to_encode)).rstrip(b"=")
+    signing_input = _JWT_HEADER_B64 + b"." + payload_b64
+    signature = hmac.new(_JWT_KEY, signing_input, hashlib.sha256).digest()
+    return (
+        signing_input + b"." + base64.urlsafe_b64encode(signature).rstrip(b"=")
+    ).decode()
 
 
 # --- Endpoint 1: User Registration ---
@@ -54,46 +160,78 @@ def create_access_token(data: dict):
 @router.post(
     "/register", response_model=schemas.UserRead, status_code=status.HTTP_201_CREATED
 )
+@retry_on_disconnect
 def register_user(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
     """
     Creates a new user account with hashed password storage.
     """
-    # Check if the email already exists
-    db_user = db.query(models.User).filter(models.User.Email == user_data.Email).first()
-    if db_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
-        )
+    # No existence pre-check: the unique index on Users.Email is the
+    # authority, and probing it with a SELECT first is both a second
+    # round-trip and a race under concurrent signups. Let the insert in
+    # sp_CreateUser hit the index and map the violation to a 400 below.
 
     # Hash the password for secure storage
     hashed_password = get_password_hash(user_data.Password)
 
     try:
-        # Use the Stored Procedure for the actual insert
-        db.execute(
-            text(
-                """
-                SET NOCOUNT ON;
-                EXEC sp_CreateUser @Email=:email, @HashedPassword=:hp, @FirstName=:fn, @LastName=:ln, @PhoneNumber=:ph, @DateOfBirth=:dob
-                """
-            ),
-            {
-                "email": user_data.Email,
-                "hp": hashed_password,
-                "fn": user_data.FirstName,
-                "ln": user_data.LastName,
-                "ph": user_data.PhoneNumber,
-                "dob": user_data.DateOfBirth,
-            },
+        # Use the Stored Procedure for the actual insert. Its INSERT ends
+        # with OUTPUT INSERTED.UserID, .Email, .FirstName, .LastName,
+        # .CreatedDate, .IsAdmin, so the response row comes back from the
+        # same round-trip — no re-fetch by email, which also probed the
+        # unique index a second time.
+        row = (
+            db.execute(
+                text(
+                    """
+                    SET NOCOUNT ON;
+                    EXEC sp_CreateUser @Email=:email, @HashedPassword=:hp, @FirstName=:fn, @LastName=:ln, @PhoneNumber=:ph, @DateOfBirth=:dob
+                    """
+                ),
+                {
+                    "email": user_data.Email,
+                    "hp": hashed_password,
+                    "fn": user_data.FirstName,
+                    "ln": user_data.LastName,
+                    "ph": user_data.PhoneNumber,
+                    "dob": user_data.DateOfBirth,
+                },
+            )
+            .mappings()
+            .first()
         )
+        if row is None:
+            raise HTTPException(
+                status_code=500, detail="Procedure failed to return the new user"
+            )
         db.commit()
+        # A fresh row exists now — make sure no stale miss lingers for
+        # this email before the next login.
+        _login_cache.pop(user_data.Email.lower(), None)
+        _missing_email_cache.pop(user_data.Email.lower(), None)
+
+        return schemas.UserRead(**row)
 
-        # Fetch the newly created user to return
-        return (
-            db.query(models.User).filter(models.User.Email == user_data.Email).first()
+    except HTTPException:
+        db.rollback()
+        raise
+
+    except IntegrityError:
+        # Unique-index violation on Users.Email — the one failure mode the
+        # old pre-check SELECT existed to catch.
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
         )
 
-    except Exception as e:
+    except DBAPIError as e:
+        db.rollback()
+        if e.connection_invalidated:
+            # Dead pooled connection, not a registration problem — let
+            # retry_on_disconnect re-run us on a fresh one.
+            raise
+        raise HTTPException(status_code=400, detail="Registration failed.")
+
+    except Exception:
         db.rollback()
         raise HTTPException(status_code=400, detail="Registration failed.")
 
@@ -102,6 +240,7 @@ def register_user(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/token")
+@retry_on_disconnect
 def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),  # FastAPI standard for username/password login
     db: Session = Depends(get_db),
@@ -109,7 +248,17 @@ def login_for_access_token(
     """
     Authenticates user and returns an access token (we'll implement the token generation later).
     """
-    user = db.query(models.User).filter(models.User.Email == form_data.username).first()
+    # Same canonical form UserCreate stores — the lookup stays an index
+    # seek on an exact value, and it doubles as the cache key below.
+    email = form_data.username.strip().lower()
+
+    # Known-missing emails short-circuit before the DB lookup
+    if email in _missing_email_cache:
+        user = None
+    else:
+        user = _lookup_login_user(db, email)
+        if user is None:
+            _missing_email_cache[email] = True
 
     # Check if user exists and password is correct
     if not user or not verify_password(form_data.password, user.HashedPassword):
@@ -119,6 +268,17 @@ def login_for_access_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Successful login with the plaintext in hand is the one safe moment
+    # to upgrade a legacy bcrypt row to argon2id.
+    if not user.HashedPassword.startswith("$argon2"):
+        db.execute(
+            update(models.User)
+            .where(models.User.UserID == user.UserID)
+            .values(HashedPassword=get_password_hash(form_data.password))
+        )
+        db.commit()
+        _login_cache.pop(email, None)
+
     # create and respond with access token
     access_token = create_access_token(data={"sub": user.Email})
     return {"access_token": access_token, "token_type": "bearer"}
@@ -127,10 +287,15 @@ def login_for_access_token(
 # --- Endpoint 3: Get Current User (To verify login) ---
 
 
-@router.get("/me", response_model=schemas.UserRead)
+@router.get("/me", response_model=None)
 def read_users_me(current_user: models.User = Depends(get_current_user)):
     """
     Retrieves the details of the currently logged-in user.
     """
-
-    return current_user
+    # Skips FastAPI's response_model re-validation: one adapter pass
+    # builds the payload and orjson writes it out.
+    return ORJSONResponse(
+        _USER_READ.dump_python(
+            _USER_READ.validate_python(current_user), mode="json"
+        )
+    )
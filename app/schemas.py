@@ -4,8 +4,7 @@ from datetime import date, datetime
 from decimal import Decimal
 from typing import List, Optional
 
-from pydantic import BaseModel, Field
-from pydantic.fields import computed_field
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 
 # --- 1. Airport Schemas ---
@@ -20,10 +19,10 @@ class AirportBase(BaseModel):
 class AirportRead(AirportBase):
     AirportID: int
 
-    class Config:
-        from_attributes = (
-            True  # Essential for Pydantic to read data directly from SQLAlchemy models
-        )
+    # Essential for Pydantic to read data directly from SQLAlchemy models;
+    # frozen instances skip the mutation/validation hooks on attribute
+    # writes, which read-only response rows never need
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 # --- 2. Aircraft Schemas ---
@@ -37,8 +36,7 @@ class AircraftBase(BaseModel):
 class AircraftRead(AircraftBase):
     AircraftID: int
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 # --- 4. Inventory Schemas ---
@@ -57,14 +55,12 @@ class InventoryRead(InventoryBase):
     InventoryID: int
     FlightID: int
     SeatsBooked: int
+    # Populated from the SeatsAvailable property on the ORM model — a
+    # plain field is computed once at validation, where computed_field
+    # re-ran the subtraction on every serialize
+    SeatsAvailable: int
 
-    # Property to show available seats
-    @computed_field
-    def SeatsAvailable(self) -> int:
-        return self.TotalSeats - self.SeatsBooked
-
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 # --- 3. Flight Schemas (for Searching and Creation) ---
@@ -94,6 +90,15 @@ class FlightUpdate(BaseModel):
     Status: Optional[str] = None
 
 
+class FlightWriteResponse(FlightBase):
+    # Slim response for admin create/update: scalar columns only, so
+    # serializing it can never trigger relationship lazy-loads after the
+    # post-commit session expiry
+    FlightID: int
+
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+
 class FlightRead(FlightBase):
     FlightID: int
 
@@ -103,8 +108,7 @@ class FlightRead(FlightBase):
     aircraft: AircraftRead
     inventory_items: List[InventoryRead]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 # --- 5. User Schemas ---
@@ -118,6 +122,14 @@ class UserCreate(BaseModel):
     PhoneNumber: Optional[str] = Field(None, max_length=20)
     DateOfBirth: Optional[date] = None
 
+    # Emails are stored canonically lowercased so the unique index on
+    # Users.Email doubles as the case-insensitive duplicate check and
+    # login lookups stay a plain index seek.
+    @field_validator("Email")
+    @classmethod
+    def _normalize_email(cls, value: str) -> str:
+        return value.strip().lower()
+
 
 class UserRead(BaseModel):
     UserID: int
@@ -127,8 +139,7 @@ class UserRead(BaseModel):
     CreatedDate: datetime
     IsAdmin: bool
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 # --- 6. Booking and Passenger Schemas (Simplified) ---
@@ -166,8 +177,7 @@ class BookingRead(BaseModel):
     flight: Optional[FlightRead]
     passengers: List["PassengerRead"]  # Forward reference needed for recursive schemas
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 class BookingSummary(BaseModel):
@@ -186,8 +196,7 @@ class BookingSummary(BaseModel):
     ArrivalDateTime: datetime  # Added
     PassengerCount: int
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 # Define PassengerRead after BookingRead uses a forward reference
@@ -195,8 +204,7 @@ class PassengerRead(PassengerBase):
     PassengerID: int
     BookingID: int
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 # Final configuration for recursive schemas (BookingRead uses PassengerRead)
@@ -1,13 +1,17 @@
 from datetime import datetime, timedelta
 
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from dotenv import load_dotenv
 
-from app import models
-from app.database import SessionLocal, engine
+# The seeder talks to the DB directly, so load .env before app.database
+# builds the connection string.
+load_dotenv(override=False)
 
-# Password hashing setup
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+import bcrypt  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app import models  # noqa: E402
+from app.database import SessionLocal, engine  # noqa: E402
 
 
 def seed_data():
@@ -21,11 +25,14 @@ def seed_data():
 
         # 1. Create a Test Aircraft (NEW)
         # Assuming your Aircraft model has ModelName and Capacity
+        # One transaction for the whole seed: flush() hands back the
+        # generated IDs where later rows need them, and the single
+        # commit at the end replaces four separate fsync round-trips.
         boeing = models.Aircraft(
             ModelCode="A319", TotalSeats=160, Manufacturer="Airbus"
         )
         db.add(boeing)
-        db.commit()  # Commit to get the boeing.AircraftID
+        db.flush()  # populates boeing.AircraftID
 
         # 2. Create Airports
         jfk = models.Airport(
@@ -41,10 +48,13 @@ def seed_data():
             Name="Dubai International", City="Dubai", Country="UAE", IATACode="DXB"
         )
         db.add_all([jfk, lhr, dxb])
-        db.commit()
+        db.flush()  # populates the AirportIDs the flights reference
 
         # 3. Create a Test User
-        hashed_pw = pwd_context.hash("password123")
+        # Minimum work factor: this is a known test fixture, and the
+        # default cost 12 spent ~250ms hashing it on every re-seed. The
+        # app's legacy-bcrypt verify path accepts any $2b$ cost.
+        hashed_pw = bcrypt.hashpw(b"password123", bcrypt.gensalt(rounds=4)).decode()
         test_user = models.User(
             Email="traveler@example.com",
             HashedPassword=hashed_pw,
@@ -52,7 +62,6 @@ def seed_data():
             LastName="Doe",
         )
         db.add(test_user)
-        db.commit()
 
         # 4. Create Flights
         flight1 = models.Flight(
@@ -75,36 +84,41 @@ def seed_data():
             BasePrice=850.00,
         )
         db.add_all([flight1, flight2])
-        db.commit()
+        db.flush()  # populates the FlightIDs for the inventory rows
 
         all_flights = db.query(models.Flight).all()
 
         if not all_flights:
             print("❌ No flights found! Seed some flights first.")
         else:
-            for flight in all_flights:
-                # 2. Check if this flight already has inventory
-                existing = (
-                    db.query(models.FlightInventory)
-                    .filter(models.FlightInventory.FlightID == flight.FlightID)
-                    .first()
-                )
-
-                if not existing:
-                    # 3. Create a default Economy class for every flight
-                    economy = models.FlightInventory(
-                        FlightID=flight.FlightID,
-                        ClassCode="Y",
-                        BaseFare=250.00,
-                        TotalSeats=150,
-                        SeatsBooked=0,
-                        IsRefundable=True,
-                    )
-                    db.add(economy)
-                    print(f"✅ Added Economy for Flight {flight.FlightNumber}")
-
-            db.commit()
+            # One pass to find flights that already carry inventory,
+            # instead of a SELECT per flight
+            covered = {
+                flight_id
+                for (flight_id,) in db.query(
+                    models.FlightInventory.FlightID
+                ).distinct()
+            }
+
+            # 3. Create a default Economy class for every uncovered
+            # flight — one executemany INSERT for the whole batch
+            inventory_rows = [
+                {
+                    "FlightID": flight.FlightID,
+                    "ClassCode": "Y",
+                    "BaseFare": 250.00,
+                    "TotalSeats": 150,
+                    "SeatsBooked": 0,
+                    "IsRefundable": True,
+                }
+                for flight in all_flights
+                if flight.FlightID not in covered
+            ]
+            if inventory_rows:
+                db.execute(insert(models.FlightInventory), inventory_rows)
+                print(f"✅ Added Economy for {len(inventory_rows)} flight(s)")
 
+        db.commit()
         print("✅ Database seeded successfully!")
         print(f"User: traveler@example.com | Password: password123")
 